@@ -6,13 +6,19 @@ Provides API endpoints for multiple LLM providers
 import os
 import json
 import asyncio
-from typing import Dict, Any, Optional, List
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 import logging
 from fastapi import FastAPI, HTTPException, Request, File, UploadFile, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-import requests
+import httpx
 import uvicorn
 import base64
 import mimetypes
@@ -20,6 +26,11 @@ from pathlib import Path
 import tempfile
 import shutil
 
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,6 +50,63 @@ app.add_middleware(
 llm_configs = {}  # Store by provider_key instead of session_id
 chat_sessions = {}
 provider_configs = {}  # Store multiple provider configurations
+session_locks = {}  # Serialize chat turns per session_id
+session_lock_users = {}  # Requests holding or waiting on each session lock
+active_generations = {}  # In-flight provider task per session_id
+routing_groups = {}  # Virtual provider key -> list of provider_keys
+route_stats = {}  # Live latency/error/load stats per provider_key
+
+# Smoothing factor for route latency and error-rate EWMAs
+ROUTE_EWMA_ALPHA = 0.3
+
+# Latency (seconds) charged for a failed call; matches the client timeout
+ROUTE_FAILURE_LATENCY = 30.0
+
+# Untried routes are assumed this many times slower than the slowest known member
+ROUTE_UNTRIED_FACTOR = 2.0
+
+# Assumed latency (seconds) when no member of a group has been measured yet
+ROUTE_DEFAULT_LATENCY = 5.0
+
+# Routes above this error rate only get traffic when every member is above it
+ROUTE_MAX_ERROR_RATE = 0.5
+
+# Seconds without traffic before a route's error rate starts to decay
+ROUTE_IDLE_AFTER = 300.0
+
+# Seconds for an idle route's error rate to decay by half
+ROUTE_ERROR_HALF_LIFE = 60.0
+
+# Share of group requests sent to a random non-best member to refresh its stats
+ROUTE_EXPLORE_RATE = 0.05
+
+# Only members below this error rate are eligible for exploration
+ROUTE_EXPLORE_MAX_ERROR_RATE = 0.25
+
+# Completion length for probes; enough to prove the route answers
+PROBE_MAX_TOKENS = 1
+
+# Seconds between background probes of idle routes (0 disables probing)
+ROUTE_PROBE_INTERVAL = float(os.getenv("ROUTE_PROBE_INTERVAL", "0"))
+
+# How often chat_endpoint checks whether the client is still connected
+DISCONNECT_POLL_INTERVAL = 0.5
+
+# Shared async HTTP client; cancelling a request closes its upstream connection
+http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use"""
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = httpx.AsyncClient()
+    return http_client
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close pooled upstream connections on shutdown"""
+    if http_client is not None:
+        await http_client.aclose()
 
 # Define LLM providers configuration
 LLM_PROVIDERS = {
@@ -91,6 +159,40 @@ LLM_PROVIDERS = {
     }
 }
 
+@dataclass
+class ChatMessage:
+    """Compact chat history entry with an interned role and epoch-ms timestamp"""
+    __slots__ = ("role", "content", "timestamp", "files")
+    role: str
+    content: str
+    timestamp: int
+    files: Optional[List[Dict[str, Any]]]
+    
+    @classmethod
+    def create(cls, role: str, content: str, files: Optional[List[Dict[str, Any]]] = None) -> "ChatMessage":
+        return cls(sys.intern(role), content, int(time.time() * 1000), files or None)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": self.timestamp,
+            "files": self.files
+        }
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, which serializes ChatMessage natively"""
+    
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=ChatMessage.to_dict
+        ).encode("utf-8")
+
 # Pydantic models for request/response validation
 class ConfigureRequest(BaseModel):
     provider: str
@@ -103,11 +205,19 @@ class ChatRequest(BaseModel):
     provider_key: str = Field(..., description="Key of the configured provider")
     files: Optional[List[Dict[str, Any]]] = None
 
+class RoutingGroupRequest(BaseModel):
+    name: str
+    provider_keys: List[str]
+
+class CancelRequest(BaseModel):
+    session_id: str = "default"
+
 class ChatResponse(BaseModel):
     success: bool
     response: Optional[str] = None 
     provider: Optional[str] = None
     model: Optional[str] = None
+    provider_key: Optional[str] = None
     session_id: Optional[str] = None
     error: Optional[str] = None
 
@@ -117,7 +227,7 @@ class SessionInfo(BaseModel):
     model: Optional[str] = None
     created_at: str
     message_count: int
-    last_message: Optional[str] = None
+    last_message: Optional[int] = None
 
 class SessionsResponse(BaseModel):
     success: bool
@@ -137,14 +247,14 @@ class LLMClient:
         self.provider = provider
         self.config = config
         
-    async def generate_response(self, messages: List[Dict[str, str]]) -> str:
-        """Generate response from the LLM"""
+    async def generate_response(self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> str:
+        """Generate response from the LLM, optionally capping completion length"""
         raise NotImplementedError
 
 class OpenAIClient(LLMClient):
     """OpenAI API client"""
     
-    async def generate_response(self, messages: List[Dict[str, str]]) -> str:
+    async def generate_response(self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> str:
         try:
             headers = {
                 "Authorization": f"Bearer {self.config['api_key']}",
@@ -157,11 +267,11 @@ class OpenAIClient(LLMClient):
             payload = {
                 "model": self.config["model_name"],
                 "messages": messages,
-                "max_tokens": 1000,
+                "max_tokens": max_tokens or 1000,
                 "temperature": 0.7
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = await get_http_client().post(url, headers=headers, json=payload, timeout=30)
             response.raise_for_status()
             
             result = response.json()
@@ -174,7 +284,7 @@ class OpenAIClient(LLMClient):
 class GeminiClient(LLMClient):
     """Google Gemini API client"""
     
-    async def generate_response(self, messages: List[Dict[str, str]]) -> str:
+    async def generate_response(self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> str:
         try:
             # Convert messages to Gemini format
             prompt = "\n".join([f"{msg['role']}: {msg['content']}" for msg in messages])
@@ -190,10 +300,12 @@ class GeminiClient(LLMClient):
                     "parts": [{"text": prompt}]
                 }]
             }
+            if max_tokens:
+                payload["generationConfig"] = {"maxOutputTokens": max_tokens}
             
             params = {"key": self.config["api_key"]}
             
-            response = requests.post(url, headers=headers, json=payload, params=params, timeout=30)
+            response = await get_http_client().post(url, headers=headers, json=payload, params=params, timeout=30)
             response.raise_for_status()
             
             result = response.json()
@@ -206,7 +318,7 @@ class GeminiClient(LLMClient):
 class OpenRouterClient(LLMClient):
     """OpenRouter API client"""
     
-    async def generate_response(self, messages: List[Dict[str, str]]) -> str:
+    async def generate_response(self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> str:
         try:
             headers = {
                 "Authorization": f"Bearer {self.config['api_key']}",
@@ -221,11 +333,11 @@ class OpenRouterClient(LLMClient):
             payload = {
                 "model": self.config["model_name"],
                 "messages": messages,
-                "max_tokens": 1000,
+                "max_tokens": max_tokens or 1000,
                 "temperature": 0.7
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = await get_http_client().post(url, headers=headers, json=payload, timeout=30)
             response.raise_for_status()
             
             result = response.json()
@@ -238,7 +350,7 @@ class OpenRouterClient(LLMClient):
 class AnthropicClient(LLMClient):
     """Anthropic Claude API client"""
     
-    async def generate_response(self, messages: List[Dict[str, str]]) -> str:
+    async def generate_response(self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> str:
         try:
             headers = {
                 "x-api-key": self.config['api_key'],
@@ -260,14 +372,14 @@ class AnthropicClient(LLMClient):
             
             payload = {
                 "model": self.config["model_name"],
-                "max_tokens": 1000,
+                "max_tokens": max_tokens or 1000,
                 "messages": user_messages
             }
             
             if system_message:
                 payload["system"] = system_message
             
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = await get_http_client().post(url, headers=headers, json=payload, timeout=30)
             response.raise_for_status()
             
             result = response.json()
@@ -280,7 +392,7 @@ class AnthropicClient(LLMClient):
 class OllamaClient(LLMClient):
     """Local Ollama API client"""
     
-    async def generate_response(self, messages: List[Dict[str, str]]) -> str:
+    async def generate_response(self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> str:
         try:
             base_url = self.config.get('base_url', LLM_PROVIDERS["Local Ollama"]["default_base_url"])
             url = f"{base_url}/api/chat"
@@ -290,8 +402,10 @@ class OllamaClient(LLMClient):
                 "messages": messages,
                 "stream": False
             }
+            if max_tokens:
+                payload["options"] = {"num_predict": max_tokens}
             
-            response = requests.post(url, json=payload, timeout=60)
+            response = await get_http_client().post(url, json=payload, timeout=60)
             response.raise_for_status()
             
             result = response.json()
@@ -321,6 +435,191 @@ def create_llm_client(provider: str, config: Dict[str, Any]) -> Optional[LLMClie
         logger.error(f"Error creating client for {provider}: {e}")
         return None
 
+class RouteStats:
+    """Live latency, error rate and load for a single provider_key"""
+    
+    def __init__(self):
+        self.latency: Optional[float] = None  # EWMA of call latency, failures at ROUTE_FAILURE_LATENCY
+        self.error_rate = 0.0  # EWMA of failed calls
+        self.in_flight = 0
+        self.samples = 0
+        self.last_used = 0.0
+    
+    def current_error_rate(self) -> float:
+        """Error rate, decayed only once the route has been idle for ROUTE_IDLE_AFTER"""
+        if self.in_flight:
+            return self.error_rate
+        idle = time.monotonic() - self.last_used - ROUTE_IDLE_AFTER
+        if idle <= 0:
+            return self.error_rate
+        return self.error_rate * 0.5 ** (idle / ROUTE_ERROR_HALF_LIFE)
+    
+    def record(self, latency: float, ok: bool, probe: bool = False):
+        """Fold a completed call into the moving averages.
+        
+        Probe latency is not comparable to real chat turns, so probes only
+        update the error rate. Failures are charged at least
+        ROUTE_FAILURE_LATENCY so a route that starts failing also looks slow.
+        """
+        self.error_rate = self.current_error_rate()
+        self.error_rate += ROUTE_EWMA_ALPHA * ((0.0 if ok else 1.0) - self.error_rate)
+        self.samples += 1
+        self.last_used = time.monotonic()
+        if not probe:
+            if not ok:
+                latency = max(latency, ROUTE_FAILURE_LATENCY)
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += ROUTE_EWMA_ALPHA * (latency - self.latency)
+    
+    def score(self, prior: float) -> float:
+        """Expected seconds for one more request here; lower is better.
+        
+        prior is the latency assumed for a route with no measurements.
+        """
+        latency = self.latency if self.latency is not None else prior
+        return latency * (1 + self.in_flight) / max(1.0 - self.current_error_rate(), 0.05)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency,
+            "error_rate": round(self.current_error_rate(), 4),
+            "in_flight": self.in_flight,
+            "samples": self.samples
+        }
+
+def select_route(group_name: str) -> Tuple[str, Optional[str]]:
+    """Pick the configured member of a routing group with the lowest score.
+    
+    Members above ROUTE_MAX_ERROR_RATE are skipped while any member is below
+    it. A small share of requests goes to another healthy member so routes
+    that lost traffic can show they have recovered; for those the best
+    member is returned as the fallback to retry on if the call fails.
+    """
+    if group_name not in routing_groups:
+        raise HTTPException(status_code=400, detail=f"Routing group {group_name} not found")
+    
+    candidates = [key for key in routing_groups[group_name] if key in provider_configs]
+    if not candidates:
+        raise HTTPException(status_code=400, detail=f"No configured providers in routing group {group_name}")
+    
+    stats = {key: route_stats.setdefault(key, RouteStats()) for key in candidates}
+    # Untried members are compared against the slowest member that is working
+    known = [
+        s.latency for s in stats.values()
+        if s.latency is not None and s.current_error_rate() <= ROUTE_EXPLORE_MAX_ERROR_RATE
+    ]
+    prior = max(known) * ROUTE_UNTRIED_FACTOR if known else ROUTE_DEFAULT_LATENCY
+    
+    healthy = [key for key in candidates if stats[key].current_error_rate() <= ROUTE_MAX_ERROR_RATE]
+    best = min(healthy or candidates, key=lambda key: stats[key].score(prior))
+    
+    explorable = [
+        key for key in candidates
+        if key != best and stats[key].current_error_rate() <= ROUTE_EXPLORE_MAX_ERROR_RATE
+    ]
+    if explorable and random.random() < ROUTE_EXPLORE_RATE:
+        return random.choice(explorable), best
+    return best, None
+
+def start_generation(provider_key: str, client: LLMClient, messages: List[Dict[str, str]],
+                     probe: bool = False) -> asyncio.Task:
+    """Start a provider call while recording its latency, outcome and load.
+    
+    The route counts as in flight from the moment the call is scheduled, so
+    concurrent selections immediately see the added load. Probes are capped
+    at PROBE_MAX_TOKENS and do not feed the latency average.
+    """
+    stats = route_stats.setdefault(provider_key, RouteStats())
+    stats.in_flight += 1
+    started = time.monotonic()
+    
+    async def run() -> str:
+        try:
+            response = await client.generate_response(
+                messages, max_tokens=PROBE_MAX_TOKENS if probe else None
+            )
+        finally:
+            stats.in_flight -= 1
+        
+        # Clients report failures as "Error: ..." replies rather than raising
+        stats.record(time.monotonic() - started, not response.startswith("Error: "), probe=probe)
+        return response
+    
+    return asyncio.ensure_future(run())
+
+async def probe_routes():
+    """Periodically send a tiny request to idle routing group members"""
+    while True:
+        await asyncio.sleep(ROUTE_PROBE_INTERVAL)
+        now = time.monotonic()
+        probes = []
+        for provider_key in {key for keys in routing_groups.values() for key in keys}:
+            stats = route_stats.setdefault(provider_key, RouteStats())
+            llm_info = provider_configs.get(provider_key)
+            if llm_info and stats.in_flight == 0 and now - stats.last_used >= ROUTE_PROBE_INTERVAL:
+                probes.append(start_generation(
+                    provider_key, llm_info["client"], [{"role": "user", "content": "ping"}], probe=True
+                ))
+        
+        results = await asyncio.gather(*probes, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Route probe error: {result}")
+
+@app.on_event("startup")
+async def start_route_probes():
+    """Start background route probing when ROUTE_PROBE_INTERVAL is set"""
+    if ROUTE_PROBE_INTERVAL > 0:
+        asyncio.ensure_future(probe_routes())
+
+@asynccontextmanager
+async def session_turn(session_id: str):
+    """Hold the session's lock, dropping it once no request needs it"""
+    lock = session_locks.setdefault(session_id, asyncio.Lock())
+    session_lock_users[session_id] = session_lock_users.get(session_id, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        session_lock_users[session_id] -= 1
+        if not session_lock_users[session_id]:
+            del session_lock_users[session_id]
+            del session_locks[session_id]
+
+async def generate_for_session(request: Request, session_id: str, provider_key: str,
+                               client: LLMClient, messages: List[Dict[str, str]]) -> Optional[str]:
+    """Run a provider call as the session's in-flight generation.
+    
+    Returns None when the call was cancelled.
+    """
+    generation = start_generation(provider_key, client, messages)
+    active_generations[session_id] = generation
+    try:
+        return await wait_for_generation(request, generation)
+    finally:
+        if active_generations.get(session_id) is generation:
+            del active_generations[session_id]
+
+async def wait_for_generation(request: Request, generation: asyncio.Task) -> Optional[str]:
+    """Await a provider call, cancelling it if the client disconnects.
+    
+    Returns None when the call was cancelled (disconnect or /api/chat/cancel).
+    """
+    try:
+        while not generation.done():
+            await asyncio.wait({generation}, timeout=DISCONNECT_POLL_INTERVAL)
+            if not generation.done() and await request.is_disconnected():
+                generation.cancel()
+    except asyncio.CancelledError:
+        generation.cancel()
+        raise
+    
+    if generation.cancelled():
+        return None
+    return generation.result()
+
 # API Routes
 @app.get("/api/providers")
 async def get_providers():
@@ -340,6 +639,10 @@ async def configure_multiple_providers(providers: Dict[str, Dict[str, Any]]):
                 'model_name': provider_data.get('model')
             }
             
+            if provider_key in routing_groups:
+                logger.warning(f"Skipping provider {provider_key}: name is used by a routing group")
+                continue
+            
             if provider and provider in LLM_PROVIDERS:
                 # Create LLM client
                 client = create_llm_client(provider, config)
@@ -362,6 +665,50 @@ async def configure_multiple_providers(providers: Dict[str, Dict[str, Any]]):
         logger.error(f"Multiple configuration error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/routing-groups")
+async def configure_routing_group(request: RoutingGroupRequest):
+    """Create or replace a routing group over equivalent provider keys"""
+    if not request.name or not request.provider_keys:
+        raise HTTPException(status_code=400, detail="Group name and provider keys are required")
+    
+    if request.name in provider_configs:
+        raise HTTPException(status_code=400, detail="Group name conflicts with a configured provider")
+    
+    routing_groups[request.name] = list(dict.fromkeys(request.provider_keys))
+    
+    return {
+        "success": True,
+        "name": request.name,
+        "provider_keys": routing_groups[request.name]
+    }
+
+@app.get("/api/routing-groups")
+async def get_routing_groups():
+    """List routing groups with live per-route stats"""
+    return {
+        "success": True,
+        "groups": {
+            name: {
+                key: route_stats.get(key, RouteStats()).to_dict()
+                for key in keys
+            }
+            for name, keys in routing_groups.items()
+        }
+    }
+
+@app.delete("/api/routing-groups/{name}")
+async def delete_routing_group(name: str):
+    """Remove a routing group"""
+    if name not in routing_groups:
+        raise HTTPException(status_code=404, detail="Routing group not found")
+    
+    del routing_groups[name]
+    
+    return {
+        "success": True,
+        "message": f"Routing group {name} removed"
+    }
+
 @app.post("/api/configure")
 async def configure_llm(request: ConfigureRequest):
     """Configure LLM provider"""
@@ -392,6 +739,8 @@ async def configure_llm(request: ConfigureRequest):
         
         # Create provider key
         provider_key = f"{provider}_{config.get('model_name')}"
+        if provider_key in routing_groups:
+            raise HTTPException(status_code=400, detail="Provider key conflicts with a routing group")
         
         # Store configuration by provider key
         provider_configs[provider_key] = {
@@ -424,6 +773,7 @@ async def configure_llm(request: ConfigureRequest):
 
 @app.post("/api/chat")
 async def chat_endpoint(
+    request: Request,
     message: str = Form(...),
     session_id: str = Form(default="default"),
     provider_key: str = Form(...),
@@ -435,6 +785,11 @@ async def chat_endpoint(
         if not message:
             raise HTTPException(status_code=400, detail="Message is required")
         
+        # Resolve routing groups to their currently best member
+        routing_group = provider_key if provider_key in routing_groups else None
+        if routing_group:
+            provider_key, _ = select_route(routing_group)
+        
         # Determine which provider config to use
         llm_info = None
         if provider_key and provider_key in provider_configs:
@@ -448,10 +803,6 @@ async def chat_endpoint(
         
         client = llm_info["client"]
         
-        # Get chat history
-        if session_id not in chat_sessions:
-            chat_sessions[session_id] = []
-        
         # Process uploaded files if any
         file_contents = []
         if files and len(files) > 0:
@@ -503,40 +854,62 @@ async def chat_endpoint(
                     enhanced_message += file_info['content'][:5000] + ("..." if len(file_info['content']) > 5000 else "")
                 enhanced_message += "\n--- End of file ---\n"
         
-        # Add user message to history
-        user_message = {
-            "role": "user",
-            "content": message,
-            "timestamp": datetime.now().isoformat()
-        }
-        if file_contents:
-            user_message["files"] = file_contents
-        
-        chat_sessions[session_id].append(user_message)
-        
-        # Prepare messages for LLM (last 10 messages to avoid token limits)
-        messages = [{"role": msg["role"], "content": msg["content"]} 
-                   for msg in chat_sessions[session_id][-10:]]
-        
-        # Use enhanced message for the latest user message if files are present
-        if file_contents and messages:
-            messages[-1]["content"] = enhanced_message
-        
-        # Generate response
-        response = await client.generate_response(messages)
-        
-        # Add AI response to history
-        chat_sessions[session_id].append({
-            "role": "assistant",
-            "content": response,
-            "timestamp": datetime.now().isoformat()
-        })
+        # Serialize turns within a session; different sessions run in parallel
+        async with session_turn(session_id):
+            # Re-select after waiting for the lock so the choice reflects current load
+            fallback_key = None
+            if routing_group:
+                provider_key, fallback_key = select_route(routing_group)
+                llm_info = provider_configs[provider_key]
+                client = llm_info["client"]
+            
+            history = chat_sessions.setdefault(session_id, [])
+            
+            # Build the user message inside the lock so timestamps follow history
+            # order; it is only committed together with the reply so cancelled
+            # turns leave no trace
+            user_message = ChatMessage.create("user", message, file_contents)
+            
+            # Prepare messages for LLM (last 10 messages to avoid token limits)
+            messages = [{"role": msg.role, "content": msg.content} 
+                       for msg in history[-9:] + [user_message]]
+            
+            # Use enhanced message for the latest user message if files are present
+            if file_contents:
+                messages[-1]["content"] = enhanced_message
+            
+            # Generate response, aborting on client disconnect or /api/chat/cancel
+            response = await generate_for_session(request, session_id, provider_key, client, messages)
+            
+            # A failed exploration turn is retried on the group's best member
+            if (response is not None and fallback_key in provider_configs
+                    and response.startswith("Error: ")):
+                logger.info(f"Route {provider_key} failed, retrying on {fallback_key}")
+                provider_key = fallback_key
+                llm_info = provider_configs[provider_key]
+                client = llm_info["client"]
+                response = await generate_for_session(request, session_id, provider_key, client, messages)
+            
+            if response is None:
+                logger.info(f"Chat request cancelled for session {session_id}")
+                return ChatResponse(
+                    success=False,
+                    session_id=session_id,
+                    error="Request cancelled"
+                )
+            
+            # Add both turns to history
+            chat_sessions.setdefault(session_id, []).extend([
+                user_message,
+                ChatMessage.create("assistant", response)
+            ])
         
         return ChatResponse(
             success=True,
             response=response,
             provider=llm_info["provider"],
             model=llm_info["config"].get("model_name"),
+            provider_key=provider_key,
             session_id=session_id
         )
         
@@ -549,52 +922,68 @@ async def chat_endpoint(
             error=str(e)
         )
 
-@app.get("/api/history/{session_id}")
+@app.post("/api/chat/cancel")
+async def cancel_chat(request: CancelRequest):
+    """Abort the in-flight chat request for a session"""
+    generation = active_generations.get(request.session_id)
+    cancelled = generation.cancel() if generation else False
+    
+    return {
+        "success": True,
+        "cancelled": cancelled,
+        "session_id": request.session_id
+    }
+
+@app.get("/api/history/{session_id}", response_class=FastJSONResponse)
 async def get_chat_history(session_id: str):
     """Get chat history for a session"""
     try:
         history = chat_sessions.get(session_id, [])
-        return {
+        return FastJSONResponse({
             "success": True,
             "history": history,
             "session_id": session_id
-        }
+        })
     except Exception as e:
         logger.error(f"History error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/sessions", response_model=SessionsResponse)
+@app.get("/api/sessions", response_model=SessionsResponse, response_class=FastJSONResponse)
 async def get_sessions():
     """Get list of all chat sessions"""
+    # Built as plain dicts matching SessionsResponse to skip model validation
     try:
         sessions = []
         for session_id, config in llm_configs.items():
             history = chat_sessions.get(session_id, [])
-            sessions.append(SessionInfo(
-                session_id=session_id,
-                provider=config["provider"],
-                model=config["config"].get("model_name"),
-                created_at=config["created_at"],
-                message_count=len(history),
-                last_message=history[-1]["timestamp"] if history else None
-            ))
+            sessions.append({
+                "session_id": session_id,
+                "provider": config["provider"],
+                "model": config["config"].get("model_name"),
+                "created_at": config["created_at"],
+                "message_count": len(history),
+                "last_message": history[-1].timestamp if history else None
+            })
         
-        return SessionsResponse(
-            success=True,
-            sessions=sessions
-        )
+        return FastJSONResponse({
+            "success": True,
+            "sessions": sessions,
+            "error": None
+        })
     except Exception as e:
         logger.error(f"Sessions error: {e}")
-        return SessionsResponse(
-            success=False,
-            sessions=[],
-            error=str(e)
-        )
+        return FastJSONResponse({
+            "success": False,
+            "sessions": [],
+            "error": str(e)
+        })
 
 @app.delete("/api/clear/{session_id}")
 async def clear_session(session_id: str):
     """Clear a specific chat session"""
     try:
+        if session_id in active_generations:
+            active_generations[session_id].cancel()
         if session_id in chat_sessions:
             del chat_sessions[session_id]
         if session_id in llm_configs:
@@ -608,15 +997,15 @@ async def clear_session(session_id: str):
         logger.error(f"Clear session error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/health", response_model=HealthResponse)
+@app.get("/api/health", response_model=HealthResponse, response_class=FastJSONResponse)
 async def health_check():
     """Health check endpoint"""
-    return HealthResponse(
-        success=True,
-        status="healthy",
-        active_sessions=len(llm_configs),
-        providers=list(LLM_PROVIDERS.keys())
-    )
+    return FastJSONResponse({
+        "success": True,
+        "status": "healthy",
+        "active_sessions": len(llm_configs),
+        "providers": list(LLM_PROVIDERS)
+    })
 
 if __name__ == '__main__':
     print("[INFO] Starting Multi-LLM Chat Backend Server...")
@@ -624,7 +1013,11 @@ if __name__ == '__main__':
     print("[INFO] API endpoints:")
     print("   GET  /api/providers - Get available LLM providers")
     print("   POST /api/configure - Configure LLM provider")
+    print("   POST /api/routing-groups - Configure a routing group")
+    print("   GET  /api/routing-groups - Get routing groups and route stats")
+    print("   DELETE /api/routing-groups/<name> - Remove a routing group")
     print("   POST /api/chat - Send chat message")
+    print("   POST /api/chat/cancel - Cancel in-flight chat request")
     print("   GET  /api/history/<session_id> - Get chat history")
     print("   GET  /api/sessions - Get all sessions")
     print("   DELETE /api/clear/<session_id> - Clear session")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for chat history storage and serialization
+
+Compares the legacy dict messages (ISO timestamp strings, FastAPI's default
+jsonable_encoder + json encoding) with ChatMessage records rendered by
+FastJSONResponse.
+
+Usage: python bench_messages.py [sizes...]   (default: 10000 100000 1000000)
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from app import ChatMessage, FastJSONResponse
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+def make_legacy_history(count: int) -> list:
+    """Build history the way chat_endpoint stored it before ChatMessage"""
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i}",
+            "timestamp": datetime.now().isoformat()
+        }
+        for i in range(count)
+    ]
+
+def make_compact_history(count: int) -> list:
+    return [
+        ChatMessage.create("user" if i % 2 == 0 else "assistant", f"message {i}")
+        for i in range(count)
+    ]
+
+def measure_memory(build, count: int) -> int:
+    """Bytes retained by a history of the given size"""
+    gc.collect()
+    tracemalloc.start()
+    history = build(count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del history
+    return size
+
+def measure_serialization(render, history: list, repeat: int = 3) -> float:
+    """Best-of-N seconds to render a history response body"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render({"success": True, "history": history, "session_id": "bench"})
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def render_legacy(content: dict) -> bytes:
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+def render_fast(content: dict) -> bytes:
+    return FastJSONResponse(content).body
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    print(f"{'messages':>10} | {'dict MB':>8} {'slots MB':>8} | {'dict ms':>9} {'fast ms':>9} {'speedup':>8}")
+    print("-" * 64)
+    for count in sizes:
+        legacy_mem = measure_memory(make_legacy_history, count)
+        compact_mem = measure_memory(make_compact_history, count)
+
+        legacy_time = measure_serialization(render_legacy, make_legacy_history(count))
+        fast_time = measure_serialization(render_fast, make_compact_history(count))
+
+        print(
+            f"{count:>10} | {legacy_mem / 1e6:>8.1f} {compact_mem / 1e6:>8.1f} | "
+            f"{legacy_time * 1000:>9.1f} {fast_time * 1000:>9.1f} {legacy_time / fast_time:>7.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
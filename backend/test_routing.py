@@ -0,0 +1,109 @@
+"""
+Tests for latency-aware routing across routing group members
+"""
+import random
+from collections import Counter
+
+import pytest
+
+import app
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(app.time, "monotonic", fake)
+    monkeypatch.setattr(app, "routing_groups", {"group": ["x", "y"]})
+    monkeypatch.setattr(app, "route_stats", {})
+    monkeypatch.setattr(app, "provider_configs", {"x": {}, "y": {}})
+    random.seed(0)
+    return fake
+
+
+def call(clock, key, behaviour) -> bool:
+    latency, ok = behaviour[key]
+    clock.now += latency
+    app.route_stats[key].record(latency, ok)
+    return ok
+
+
+def route(clock, behaviour, requests, gap=20.0):
+    """Send requests the way chat_endpoint does; behaviour maps key -> (latency, ok).
+
+    Returns the calls made per member and the number of error replies users saw.
+    """
+    calls = Counter()
+    errors = 0
+    for _ in range(requests):
+        key, fallback = app.select_route("group")
+        calls[key] += 1
+        ok = call(clock, key, behaviour)
+        if not ok and fallback:
+            calls[fallback] += 1
+            ok = call(clock, fallback, behaviour)
+        errors += not ok
+        clock.now += gap
+    return calls, errors
+
+
+def test_dead_member_never_answers_users(clock):
+    calls, errors = route(clock, {"x": (0.01, False), "y": (10.0, True)}, 200)
+
+    # Only the very first call, to a member nothing is known about, can fail
+    assert errors <= 1
+    assert calls["x"] <= 10
+
+
+def test_member_that_starts_timing_out_loses_traffic(clock):
+    route(clock, {"x": (2.0, True), "y": (10.0, True)}, 20)
+    calls, errors = route(clock, {"x": (30.0, False), "y": (10.0, True)}, 100)
+
+    # Only the first timeout reaches a user; later calls to x are exploration
+    assert errors <= 1
+    assert calls["x"] <= 10
+
+
+def test_error_rate_does_not_decay_between_regular_calls(clock):
+    stats = app.RouteStats()
+    stats.record(30.0, False)
+    clock.now += app.ROUTE_IDLE_AFTER / 2
+
+    assert stats.current_error_rate() == pytest.approx(app.ROUTE_EWMA_ALPHA)
+
+
+def test_failures_count_towards_latency(clock):
+    stats = app.RouteStats()
+    stats.record(2.0, True)
+    stats.record(0.01, False)
+
+    assert stats.latency > 2.0
+
+
+def test_recovered_member_wins_traffic_back(clock):
+    route(clock, {"x": (2.0, True), "y": (10.0, True)}, 20)
+    route(clock, {"x": (30.0, False), "y": (10.0, True)}, 20)
+
+    clock.now += 3600
+    calls, errors = route(clock, {"x": (2.0, True), "y": (10.0, True)}, 200)
+
+    assert errors == 0
+    assert calls["x"] > calls["y"]
+
+
+def test_untried_member_scored_against_known_latency(clock, monkeypatch):
+    monkeypatch.setattr(app.random, "random", lambda: 1.0)  # no exploration
+    app.route_stats["x"] = app.RouteStats()
+    app.route_stats["x"].record(2.0, True)
+
+    # Under a burst the untried member only takes over once x is truly loaded
+    assert app.select_route("group") == ("x", None)
+    app.route_stats["x"].in_flight = 2
+    assert app.select_route("group") == ("y", None)
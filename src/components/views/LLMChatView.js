@@ -577,6 +577,23 @@ export class LLMChatView extends LitElement {
         resizeLayout();
     }
 
+    disconnectedCallback() {
+        super.disconnectedCallback();
+        // Abort the in-flight request so the backend frees the provider connection
+        if (this.isLoading) {
+            this.cancelPendingRequest();
+        }
+    }
+
+    cancelPendingRequest() {
+        fetch(`${this.backendUrl}/api/chat/cancel`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ session_id: this.sessionId }),
+            keepalive: true
+        }).catch(error => console.error('Error cancelling request:', error));
+    }
+
     async checkBackendConnection() {
         try {
             const response = await fetch(`${this.backendUrl}/api/health`);